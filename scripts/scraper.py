@@ -4,7 +4,7 @@ Parking Price Scraper for Brisbane
 Scrapes Wilson Parking and Secure Parking websites for current rates.
 """
 
-import json
+import asyncio
 import re
 import sys
 from datetime import datetime, timezone
@@ -12,7 +12,10 @@ from pathlib import Path
 from typing import Optional
 
 import httpx
-from bs4 import BeautifulSoup
+import orjson
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
+from lxml import html as lxml_html
 
 # Output path
 OUTPUT_PATH = Path(__file__).parent.parent / "data" / "prices.json"
@@ -22,8 +25,12 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
     "Accept-Language": "en-AU,en;q=0.9",
+    "Accept-Encoding": "gzip, br, deflate",
 }
 
+# Upper bound on in-flight requests across both providers
+REQUEST_SEMAPHORE = asyncio.Semaphore(8)
+
 # Brisbane Secure Parking car parks with known IDs
 SECURE_BRISBANE = {
     "480-queen-street": {
@@ -123,176 +130,257 @@ WILSON_BRISBANE = {
     },
 }
 
+# Skeleton records copied for each car park, keys in output order
+SECURE_TEMPLATE = {
+    "provider": "secure",
+    "id": None,
+    "name": None,
+    "address": None,
+    "lat": None,
+    "lng": None,
+    "hourly": None,
+    "daily": None,
+    "early_bird": None,
+    "night": None,
+    "weekend": None,
+    "scraped_at": None,
+    "source": "scraped",
+}
+WILSON_TEMPLATE = {**SECURE_TEMPLATE, "provider": "wilson"}
+
+# Precompiled patterns used while scanning page text
+PRICE_RE = re.compile(r"\$(\d+(?:\.\d{2})?)")
+DOLLAR_RE = re.compile(r"\$\d+(?:\.\d{2})?")
+RATE_CONTEXT_RE = re.compile(
+    r"(?P<early_bird>early|bird)|(?P<hourly>hour|/hr)|(?P<daily>day|daily|max)"
+    r"|\$(?P<price>\d+(?:\.\d{2})?)",
+    re.IGNORECASE,
+)
+# Any Secure car park name (names are literal text, not patterns),
+# mapped back to the car park ID via the lowercased match
+SECURE_NAME_RE = re.compile(
+    "|".join(re.escape(info["name"]) for info in SECURE_BRISBANE.values()),
+    re.IGNORECASE,
+)
+SECURE_NAME_IDS = {info["name"].lower(): park_id for park_id, info in SECURE_BRISBANE.items()}
+
+# Only build the parts of the Secure page that can hold prices:
+# car park names are looked up inside their enclosing div/article
+SECURE_STRAINER = SoupStrainer(["div", "article"])
+
+# Wilson pages are queried with lxml directly
+# Elements whose text is never visible rate information
+SKIP_TEXT_TAGS = {"script", "style"}
+# Elements whose class mentions rate/price/tariff (case-insensitive)
+WILSON_RATE_XPATH = etree.XPath(
+    "//*[re:test(@class, 'rate|price|tariff', 'i')]",
+    namespaces={"re": "http://exslt.org/regular-expressions"},
+)
+
 
 def extract_price(text: str) -> Optional[float]:
     """Extract a price from text like '$15.00' or '$15'."""
-    if not text:
+    if not text or "$" not in text:
         return None
-    match = re.search(r"\$(\d+(?:\.\d{2})?)", text)
+    match = PRICE_RE.search(text)
     if match:
         return float(match.group(1))
     return None
 
 
-def scrape_secure_parking() -> list[dict]:
+def iter_text_nodes(root):
+    """
+    Yield (text, element) for each text node under an lxml element,
+    where element is the one that contains the text.
+    Script and style contents are skipped.
+    """
+    for element in root.iter():
+        if element.text and isinstance(element.tag, str) and element.tag not in SKIP_TEXT_TAGS:
+            yield element.text, element
+        if element.tail and element is not root:
+            yield element.tail, element.getparent()
+
+
+def scan_text_prices(doc, park_data: dict, limit: int = 10) -> None:
+    """
+    Assign prices from the first few dollar text nodes in an lxml document,
+    judging each by the text of the element that contains it.
+    Only empty fields are filled.
+    """
+    found = 0
+    for text, parent in iter_text_nodes(doc):
+        price = extract_price(text)
+        if price is None:
+            continue
+        
+        if price:
+            # "max" is left out of the day check as it is too common
+            # outside rate text
+            parent_text = parent.text_content().lower()
+            if ("hour" in parent_text or "/hr" in parent_text) and not park_data["hourly"]:
+                park_data["hourly"] = price
+            elif ("early" in parent_text or "bird" in parent_text) and not park_data["early_bird"]:
+                park_data["early_bird"] = price
+            elif "day" in parent_text and not park_data["daily"]:
+                park_data["daily"] = price
+        
+        found += 1
+        if found == limit:
+            break
+
+
+async def fetch(client: httpx.AsyncClient, url: str) -> httpx.Response:
+    """GET a page, waiting for a free slot in the shared request limit."""
+    async with REQUEST_SEMAPHORE:
+        return await client.get(url)
+
+
+async def scrape_secure_parking(client: httpx.AsyncClient) -> list[dict]:
     """
     Scrape Secure Parking Brisbane rates page.
     Returns list of car park pricing data.
     """
     results = []
+    scraped_at = datetime.now(timezone.utc).isoformat()
     url = "https://www.secureparking.com.au/en-au/car-park-rates/brisbane/"
     
     print(f"Scraping Secure Parking: {url}")
     
     try:
-        with httpx.Client(timeout=30.0, follow_redirects=True) as client:
-            response = client.get(url, headers=HEADERS)
-            response.raise_for_status()
+        response = await fetch(client, url)
+        response.raise_for_status()
+        
+        # Find the first text node mentioning each car park in a single
+        # pass over the page, rather than rescanning it once per car park.
+        # Pages without a single "$" carry no prices, so skip parsing them.
+        park_sections = {}
+        if b"$" in response.content:
+            soup = BeautifulSoup(response.text, "lxml", parse_only=SECURE_STRAINER)
             
-            soup = BeautifulSoup(response.text, "lxml")
+            for string in soup.strings:
+                for match in SECURE_NAME_RE.finditer(string):
+                    park_sections.setdefault(SECURE_NAME_IDS[match.group(0).lower()], string)
+        
+        # The page structure has car park sections
+        # Look for car park name patterns in the HTML
+        for park_id, park_info in SECURE_BRISBANE.items():
+            park_data = SECURE_TEMPLATE.copy()
+            park_data.update(
+                id=park_id,
+                name=park_info["name"],
+                address=park_info["address"],
+                lat=park_info["lat"],
+                lng=park_info["lng"],
+                scraped_at=scraped_at,
+            )
+            
+            # Try to find this car park in the HTML
+            # Secure Parking uses dynamic content, so we may not get prices
+            # from static HTML - but we can try
+            park_section = park_sections.get(park_id)
+            
+            if park_section:
+                # Look for nearby price elements
+                parent = park_section.find_parent("div") or park_section.find_parent("article")
+                if parent:
+                    price_texts = parent.find_all(string=DOLLAR_RE)
+                    for price_text in price_texts:
+                        price = extract_price(str(price_text))
+                        if price and not park_data["hourly"]:
+                            park_data["hourly"] = price
+            
+            results.append(park_data)
             
-            # The page structure has car park sections
-            # Look for car park name patterns in the HTML
-            for park_id, park_info in SECURE_BRISBANE.items():
-                park_data = {
-                    "provider": "secure",
-                    "id": park_id,
-                    "name": park_info["name"],
-                    "address": park_info["address"],
-                    "lat": park_info["lat"],
-                    "lng": park_info["lng"],
-                    "hourly": None,
-                    "daily": None,
-                    "early_bird": None,
-                    "night": None,
-                    "weekend": None,
-                    "scraped_at": datetime.now(timezone.utc).isoformat(),
-                    "source": "scraped",
-                }
-                
-                # Try to find this car park in the HTML
-                # Secure Parking uses dynamic content, so we may not get prices
-                # from static HTML - but we can try
-                park_section = soup.find(string=re.compile(park_info["name"], re.IGNORECASE))
-                
-                if park_section:
-                    # Look for nearby price elements
-                    parent = park_section.find_parent("div") or park_section.find_parent("article")
-                    if parent:
-                        price_texts = parent.find_all(string=re.compile(r"\$\d+"))
-                        for price_text in price_texts:
-                            price = extract_price(str(price_text))
-                            if price and not park_data["hourly"]:
-                                park_data["hourly"] = price
-                
-                results.append(park_data)
-                
     except Exception as e:
         print(f"Error scraping Secure Parking: {e}")
         # Return basic data without prices
         for park_id, park_info in SECURE_BRISBANE.items():
-            results.append({
-                "provider": "secure",
-                "id": park_id,
-                "name": park_info["name"],
-                "address": park_info["address"],
-                "lat": park_info["lat"],
-                "lng": park_info["lng"],
-                "hourly": None,
-                "daily": None,
-                "early_bird": None,
-                "error": str(e),
-                "scraped_at": datetime.now(timezone.utc).isoformat(),
-                "source": "error",
-            })
+            park_data = SECURE_TEMPLATE.copy()
+            park_data.update(
+                id=park_id,
+                name=park_info["name"],
+                address=park_info["address"],
+                lat=park_info["lat"],
+                lng=park_info["lng"],
+                scraped_at=scraped_at,
+                source="error",
+                error=str(e),
+            )
+            results.append(park_data)
     
     return results
 
 
-def scrape_wilson_parking() -> list[dict]:
+async def scrape_wilson_parking(client: httpx.AsyncClient) -> list[dict]:
     """
     Scrape Wilson Parking Brisbane pages.
+    All car park pages are fetched concurrently.
     Returns list of car park pricing data.
     """
     results = []
+    scraped_at = datetime.now(timezone.utc).isoformat()
     
     print("Scraping Wilson Parking...")
     
-    with httpx.Client(timeout=30.0, follow_redirects=True) as client:
-        for park_id, park_info in WILSON_BRISBANE.items():
-            park_data = {
-                "provider": "wilson",
-                "id": park_id,
-                "name": park_info["name"],
-                "address": park_info["address"],
-                "lat": park_info["lat"],
-                "lng": park_info["lng"],
-                "hourly": None,
-                "daily": None,
-                "early_bird": None,
-                "night": None,
-                "weekend": None,
-                "scraped_at": datetime.now(timezone.utc).isoformat(),
-                "source": "scraped",
-            }
+    for park_info in WILSON_BRISBANE.values():
+        print(f"  Fetching: {park_info['name']}")
+    tasks = [fetch(client, park_info["url"]) for park_info in WILSON_BRISBANE.values()]
+    responses = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    for (park_id, park_info), response in zip(WILSON_BRISBANE.items(), responses):
+        park_data = WILSON_TEMPLATE.copy()
+        park_data.update(
+            id=park_id,
+            name=park_info["name"],
+            address=park_info["address"],
+            lat=park_info["lat"],
+            lng=park_info["lng"],
+            scraped_at=scraped_at,
+        )
+        
+        try:
+            if isinstance(response, Exception):
+                raise response
             
-            try:
-                print(f"  Fetching: {park_info['name']}")
-                response = client.get(park_info["url"], headers=HEADERS)
+            if response.status_code != 200:
+                park_data["error"] = f"HTTP {response.status_code}"
+                park_data["source"] = "error"
+            elif b"$" in response.content:
+                # Pages without a single "$" carry no prices, so skip parsing them
+                doc = lxml_html.fromstring(response.content)
                 
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "lxml")
-                    
-                    # Wilson's pages have pricing in various formats
-                    # Look for common price patterns
-                    
-                    # Try to find price tables or rate sections
-                    rate_sections = soup.find_all(class_=re.compile(r"rate|price|tariff", re.IGNORECASE))
-                    
-                    for section in rate_sections:
-                        text = section.get_text()
-                        
-                        # Look for hourly rate
-                        if re.search(r"hour|/hr", text, re.IGNORECASE):
-                            price = extract_price(text)
-                            if price and not park_data["hourly"]:
-                                park_data["hourly"] = price
-                        
-                        # Look for daily max
-                        if re.search(r"day|daily|max", text, re.IGNORECASE):
-                            price = extract_price(text)
-                            if price and not park_data["daily"]:
-                                park_data["daily"] = price
-                        
-                        # Look for early bird
-                        if re.search(r"early|bird", text, re.IGNORECASE):
-                            price = extract_price(text)
-                            if price and not park_data["early_bird"]:
-                                park_data["early_bird"] = price
-                    
-                    # Also search for prices in any text
-                    all_prices = soup.find_all(string=re.compile(r"\$\d+(?:\.\d{2})?"))
-                    for price_text in all_prices[:10]:  # Limit to first 10
-                        parent_text = str(price_text.parent.get_text()) if price_text.parent else ""
-                        price = extract_price(str(price_text))
-                        
-                        if price:
-                            if re.search(r"hour|/hr", parent_text, re.IGNORECASE) and not park_data["hourly"]:
-                                park_data["hourly"] = price
-                            elif re.search(r"early|bird", parent_text, re.IGNORECASE) and not park_data["early_bird"]:
-                                park_data["early_bird"] = price
-                            elif re.search(r"day|daily", parent_text, re.IGNORECASE) and not park_data["daily"]:
-                                park_data["daily"] = price
-                else:
-                    park_data["error"] = f"HTTP {response.status_code}"
-                    park_data["source"] = "error"
+                # Wilson's pages have pricing in various formats
+                # Look for common price patterns
+                
+                # Try to find price tables or rate sections
+                rate_sections = WILSON_RATE_XPATH(doc)
+                
+                for section in rate_sections:
+                    # Single scan collects the rate context keywords and the
+                    # first price; group names match the park_data fields
+                    fields = set()
+                    price = None
+                    for match in RATE_CONTEXT_RE.finditer(section.text_content()):
+                        if match.lastgroup == "price":
+                            if price is None:
+                                price = float(match.group("price"))
+                        else:
+                            fields.add(match.lastgroup)
                     
-            except Exception as e:
-                print(f"    Error: {e}")
-                park_data["error"] = str(e)
-                park_data["source"] = "error"
-            
-            results.append(park_data)
+                    if price:
+                        for field in fields:
+                            if not park_data[field]:
+                                park_data[field] = price
+                
+                # Also search for prices in any text
+                scan_text_prices(doc, park_data)
+                
+        except Exception as e:
+            print(f"    Error ({park_info['name']}): {e}")
+            park_data["error"] = str(e)
+            park_data["source"] = "error"
+        
+        results.append(park_data)
     
     return results
 
@@ -330,27 +418,33 @@ def merge_with_fallback(results: list[dict], provider: str, fallback: dict) -> l
     """
     provider_fallback = fallback.get(provider, {})
     
+    # Flatten the fallback into one park_id -> price lookup per field
+    field_fallbacks = {
+        field: {
+            park_id: prices[field]
+            for park_id, prices in provider_fallback.items()
+            if prices.get(field)
+        }
+        for field in ("hourly", "daily", "early_bird")
+    }
+    
     for result in results:
         park_id = result["id"]
-        park_fallback = provider_fallback.get(park_id, {})
+        filled = 0
         
         # Use fallback for any missing prices
-        if result.get("hourly") is None and park_fallback.get("hourly"):
-            result["hourly"] = park_fallback["hourly"]
-            result["source"] = result.get("source", "scraped") + "+fallback"
-        
-        if result.get("daily") is None and park_fallback.get("daily"):
-            result["daily"] = park_fallback["daily"]
-            result["source"] = result.get("source", "scraped") + "+fallback"
+        for field, park_prices in field_fallbacks.items():
+            if result.get(field) is None and park_id in park_prices:
+                result[field] = park_prices[park_id]
+                filled += 1
         
-        if result.get("early_bird") is None and park_fallback.get("early_bird"):
-            result["early_bird"] = park_fallback["early_bird"]
-            result["source"] = result.get("source", "scraped") + "+fallback"
+        if filled:
+            result["source"] = result.get("source", "scraped") + "+fallback" * filled
     
     return results
 
 
-def main():
+async def main():
     """Main scraper entry point."""
     print("=" * 60)
     print("Parkmate Price Scraper")
@@ -360,9 +454,21 @@ def main():
     # Load fallback prices
     fallback = load_fallback_prices()
     
-    # Scrape both providers
-    secure_results = scrape_secure_parking()
-    wilson_results = scrape_wilson_parking()
+    # Scrape both providers concurrently over one shared client.
+    # HTTP/2 lets requests to the same host share one multiplexed connection.
+    async with httpx.AsyncClient(
+        http2=True,
+        timeout=30.0,
+        follow_redirects=True,
+        headers=HEADERS,
+        limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+    ) as client:
+        async with asyncio.TaskGroup() as tg:
+            secure_task = tg.create_task(scrape_secure_parking(client))
+            wilson_task = tg.create_task(scrape_wilson_parking(client))
+    
+    secure_results = secure_task.result()
+    wilson_results = wilson_task.result()
     
     # Merge with fallback where needed
     secure_results = merge_with_fallback(secure_results, "secure", fallback)
@@ -379,8 +485,7 @@ def main():
     
     # Write output
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUTPUT_PATH, "w") as f:
-        json.dump(output, f, indent=2)
+    OUTPUT_PATH.write_bytes(orjson.dumps(output, option=orjson.OPT_INDENT_2))
     
     print()
     print("=" * 60)
@@ -401,4 +506,4 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(asyncio.run(main()))
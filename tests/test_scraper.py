@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+from lxml import html as lxml_html
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from scraper import WILSON_TEMPLATE, scan_text_prices  # noqa: E402
+
+
+def scan(markup: str) -> dict:
+    park_data = WILSON_TEMPLATE.copy()
+    scan_text_prices(lxml_html.fromstring(markup), park_data)
+    return park_data
+
+
+def test_style_text_does_not_set_context():
+    park_data = scan("<html><head><style>img{max-width:100%}</style></head>"
+                     "<body><p>$15 per hour</p></body></html>")
+    assert park_data["hourly"] == 15.0
+    assert park_data["daily"] is None
+
+
+def test_context_comes_from_the_price_element():
+    park_data = scan("<div><h3>Early Bird</h3><p>Entry before 9am weekdays</p><p>$25</p></div>")
+    assert park_data["early_bird"] is None
+    assert park_data["daily"] is None
+
+
+def test_distant_keywords_are_ignored():
+    park_data = scan("<div><p>Open 24 hours, 7 days a week</p><p>Gift cards from $50</p></div>")
+    assert park_data["hourly"] is None
+    assert park_data["daily"] is None
+
+
+def test_hour_takes_priority_over_early_bird_and_day():
+    park_data = scan("<p>Early bird $20 per hour, any day</p>")
+    assert park_data["hourly"] == 20.0
+    assert park_data["early_bird"] is None
+
+
+def test_max_alone_is_not_daily():
+    park_data = scan("<p>Max stay $30</p>")
+    assert park_data["daily"] is None
+
+
+def test_only_first_ten_price_nodes_are_used():
+    markup = "".join(f"<p>${n}</p>" for n in range(10, 20)) + "<p>$40 per day</p>"
+    assert scan(f"<div>{markup}</div>")["daily"] is None